@@ -14,6 +14,14 @@ SCREEN_TITLE = "Chess"
 # The pieces are natively 240px, we need to scale them down
 CHARACTER_SCALING = SQUARE_SIZE / 240
 
+# How many plies between full position snapshots when recording a game
+CHECKPOINT_INTERVAL = 16
+
+# How many position keys to keep for repetition detection, which only has to
+# look back as far as the fifty-move rule allows
+REPETITION_HISTORY_SIZE = 128
+FIFTY_MOVE_PLIES = 100
+
 
 # Colors
 WHITE_COLOR = csscolor.GHOST_WHITE
@@ -35,27 +43,59 @@ class Side(Enum):
         return Side.WHITE
 
 
+class BoardTransform:
+    """Where a board sits on the screen, and how big its squares are."""
+
+    def __init__(
+        self, left: float = 0, bot: float = 0, square_size: float = SQUARE_SIZE
+    ):
+        """Initialize with the bottom left corner and square size in pixels."""
+        self.left = left
+        self.bot = bot
+        self.square_size = square_size
+
+        self.right = left + 8 * square_size
+        self.top = bot + 8 * square_size
+
+        # The pieces are natively 240px, we need to scale them down
+        self.character_scaling = square_size / 240
+
+    def contains(self, x_px: float, y_px: float):
+        """Tell whether an x and y location in pixels is on this board."""
+        return self.left <= x_px < self.right and self.bot <= y_px < self.top
+
+
+# The single board filling the left of the screen
+BOARD_TRANSFORM = BoardTransform()
+
+
 class BoardPosition:
     """A utility class to handle board position to pixel conversions."""
 
-    def __init__(self, col_idx: int, row_idx: int):
+    def __init__(
+        self, col_idx: int, row_idx: int, transform: BoardTransform = BOARD_TRANSFORM
+    ):
         """Initialize with row and column indices and calculate edges and centers."""
         self.row_idx = row_idx
         self.col_idx = col_idx
+        self.transform = transform
 
-        self.left = self.col_idx * SQUARE_SIZE
-        self.right = (self.col_idx + 1) * SQUARE_SIZE
-        self.bot = self.row_idx * SQUARE_SIZE
-        self.top = (self.row_idx + 1) * SQUARE_SIZE
+        square_size = transform.square_size
+        self.left = transform.left + self.col_idx * square_size
+        self.right = transform.left + (self.col_idx + 1) * square_size
+        self.bot = transform.bot + self.row_idx * square_size
+        self.top = transform.bot + (self.row_idx + 1) * square_size
 
         self.center_x = (self.left + self.right) / 2
         self.center_y = (self.bot + self.top) / 2
 
     @staticmethod
-    def get_from_pixels(x_px: float, y_px: float):
-        col_idx = x_px // SQUARE_SIZE
-        row_idx = y_px // SQUARE_SIZE
-        return BoardPosition(col_idx, row_idx)
+    def get_from_pixels(
+        x_px: float, y_px: float, transform: BoardTransform = BOARD_TRANSFORM
+    ):
+        col_idx = int((x_px - transform.left) // transform.square_size)
+        row_idx = int((y_px - transform.bot) // transform.square_size)
+        return BoardPosition(col_idx, row_idx, transform)
 
     def __str__(self):
         """Get the canonical chess representation of the position."""
@@ -82,7 +122,9 @@ class BoardPosition:
         """Get a new BoardPosition instance with the given x and y offset from this instance."""
         if not self.check_valid(x_offset, y_offset):
             raise ValueError("Invalid position")
-        return BoardPosition(self.col_idx + x_offset, self.row_idx + y_offset)
+        return BoardPosition(
+            self.col_idx + x_offset, self.row_idx + y_offset, self.transform
+        )
 
     def __eq__(self, other):
         if not isinstance(other, BoardPosition):
@@ -90,4 +132,8 @@ class BoardPosition:
         return self.row_idx == other.row_idx and self.col_idx == other.col_idx
 
     def __hash__(self):
-        return hash(self.row_idx, self.col_idx)
+        return hash((self.row_idx, self.col_idx))
+
+    def get_square(self):
+        """Get the column and row indices as a tuple."""
+        return self.col_idx, self.row_idx
@@ -0,0 +1,185 @@
+"""Position evaluation for PyChess."""
+from __future__ import annotations
+
+from constants import Side
+from history import Position, Square
+from pieces import King, Queen, Bishop, Rook, Knight, Pawn
+
+
+# Material values in centipawns, for the middlegame and the endgame
+MG_VALUES = {Pawn: 100, Knight: 320, Bishop: 330, Rook: 500, Queen: 900, King: 0}
+EG_VALUES = {Pawn: 120, Knight: 300, Bishop: 320, Rook: 520, Queen: 900, King: 0}
+
+# How much each piece counts toward the middlegame, out of MAX_PHASE for the
+# starting position
+PHASE_WEIGHTS = {Pawn: 0, Knight: 1, Bishop: 1, Rook: 2, Queen: 4, King: 0}
+MAX_PHASE = 24
+
+# Piece-square tables from white's point of view, laid out as seen from white's
+# side of the board (so the first row is rank 8)
+PAWN_TABLE = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [50, 50, 50, 50, 50, 50, 50, 50],
+    [10, 10, 20, 30, 30, 20, 10, 10],
+    [5, 5, 10, 25, 25, 10, 5, 5],
+    [0, 0, 0, 20, 20, 0, 0, 0],
+    [5, -5, -10, 0, 0, -10, -5, 5],
+    [5, 10, 10, -20, -20, 10, 10, 5],
+    [0, 0, 0, 0, 0, 0, 0, 0],
+]
+PAWN_ENDGAME_TABLE = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [80, 80, 80, 80, 80, 80, 80, 80],
+    [50, 50, 50, 50, 50, 50, 50, 50],
+    [30, 30, 30, 30, 30, 30, 30, 30],
+    [20, 20, 20, 20, 20, 20, 20, 20],
+    [10, 10, 10, 10, 10, 10, 10, 10],
+    [10, 10, 10, 10, 10, 10, 10, 10],
+    [0, 0, 0, 0, 0, 0, 0, 0],
+]
+KNIGHT_TABLE = [
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+    [-40, -20, 0, 0, 0, 0, -20, -40],
+    [-30, 0, 10, 15, 15, 10, 0, -30],
+    [-30, 5, 15, 20, 20, 15, 5, -30],
+    [-30, 0, 15, 20, 20, 15, 0, -30],
+    [-30, 5, 10, 15, 15, 10, 5, -30],
+    [-40, -20, 0, 5, 5, 0, -20, -40],
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+]
+BISHOP_TABLE = [
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+    [-10, 0, 0, 0, 0, 0, 0, -10],
+    [-10, 0, 5, 10, 10, 5, 0, -10],
+    [-10, 5, 5, 10, 10, 5, 5, -10],
+    [-10, 0, 10, 10, 10, 10, 0, -10],
+    [-10, 10, 10, 10, 10, 10, 10, -10],
+    [-10, 5, 0, 0, 0, 0, 5, -10],
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+]
+ROOK_TABLE = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [5, 10, 10, 10, 10, 10, 10, 5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [0, 0, 0, 5, 5, 0, 0, 0],
+]
+QUEEN_TABLE = [
+    [-20, -10, -10, -5, -5, -10, -10, -20],
+    [-10, 0, 0, 0, 0, 0, 0, -10],
+    [-10, 0, 5, 5, 5, 5, 0, -10],
+    [-5, 0, 5, 5, 5, 5, 0, -5],
+    [0, 0, 5, 5, 5, 5, 0, -5],
+    [-10, 5, 5, 5, 5, 5, 0, -10],
+    [-10, 0, 5, 0, 0, 0, 0, -10],
+    [-20, -10, -10, -5, -5, -10, -10, -20],
+]
+KING_TABLE = [
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-20, -30, -30, -40, -40, -30, -30, -20],
+    [-10, -20, -20, -20, -20, -20, -20, -10],
+    [20, 20, 0, 0, 0, 0, 20, 20],
+    [20, 30, 10, 0, 0, 10, 30, 20],
+]
+KING_ENDGAME_TABLE = [
+    [-50, -40, -30, -20, -20, -30, -40, -50],
+    [-30, -20, -10, 0, 0, -10, -20, -30],
+    [-30, -10, 20, 30, 30, 20, -10, -30],
+    [-30, -10, 30, 40, 40, 30, -10, -30],
+    [-30, -10, 30, 40, 40, 30, -10, -30],
+    [-30, -10, 20, 30, 30, 20, -10, -30],
+    [-30, -30, 0, 0, 0, 0, -30, -30],
+    [-50, -30, -30, -30, -30, -30, -30, -50],
+]
+
+MG_TABLES = {
+    Pawn: PAWN_TABLE,
+    Knight: KNIGHT_TABLE,
+    Bishop: BISHOP_TABLE,
+    Rook: ROOK_TABLE,
+    Queen: QUEEN_TABLE,
+    King: KING_TABLE,
+}
+EG_TABLES = {
+    **MG_TABLES,
+    Pawn: PAWN_ENDGAME_TABLE,
+    King: KING_ENDGAME_TABLE,
+}
+
+
+def build_square_scores(values, tables):
+    """Fold material and piece-square tables into signed per-square scores.
+
+    The result maps a side and piece class to a score for each square, from
+    white's point of view, so an update is a single lookup.
+    """
+    scores = {}
+    for piece_cls, table in tables.items():
+        for side in (Side.WHITE, Side.BLACK):
+            sign = 1 if side == Side.WHITE else -1
+            square_scores = {}
+            for col in range(8):
+                for row in range(8):
+                    # Black's table is white's, mirrored top to bottom
+                    table_row = 7 - row if side == Side.WHITE else row
+                    value = values[piece_cls] + table[table_row][col]
+                    square_scores[(col, row)] = sign * value
+            scores[(side, piece_cls)] = square_scores
+    return scores
+
+
+MG_SCORES = build_square_scores(MG_VALUES, MG_TABLES)
+EG_SCORES = build_square_scores(EG_VALUES, EG_TABLES)
+
+
+class Evaluation:
+    """A tapered material and piece-square evaluation.
+
+    The middlegame and endgame scores and the game phase are kept as running
+    sums, so each change to the board is a constant-time update.
+    """
+
+    def __init__(self):
+        self.mg_score = 0
+        self.eg_score = 0
+        self.phase = 0
+
+    @staticmethod
+    def from_position(position: Position) -> Evaluation:
+        """Evaluate a position from scratch."""
+        evaluation = Evaluation()
+        for square, (side, piece_cls) in position.items():
+            evaluation.add_piece(side, piece_cls, square)
+        return evaluation
+
+    def add_piece(self, side: Side, piece_cls: type, square: Square):
+        """Account for a piece being put on a square."""
+        self.mg_score += MG_SCORES[(side, piece_cls)][square]
+        self.eg_score += EG_SCORES[(side, piece_cls)][square]
+        self.phase += PHASE_WEIGHTS[piece_cls]
+
+    def remove_piece(self, side: Side, piece_cls: type, square: Square):
+        """Account for a piece being taken off a square."""
+        self.mg_score -= MG_SCORES[(side, piece_cls)][square]
+        self.eg_score -= EG_SCORES[(side, piece_cls)][square]
+        self.phase -= PHASE_WEIGHTS[piece_cls]
+
+    def move_piece(self, side: Side, piece_cls: type, start: Square, end: Square):
+        """Account for a piece moving between squares."""
+        mg_scores = MG_SCORES[(side, piece_cls)]
+        eg_scores = EG_SCORES[(side, piece_cls)]
+        self.mg_score += mg_scores[end] - mg_scores[start]
+        self.eg_score += eg_scores[end] - eg_scores[start]
+
+    def score(self) -> float:
+        """Get the score in centipawns, positive when white is better."""
+        phase = min(self.phase, MAX_PHASE)
+        return (
+            self.mg_score * phase + self.eg_score * (MAX_PHASE - phase)
+        ) / MAX_PHASE
@@ -0,0 +1,172 @@
+"""Move history and position snapshots for PyChess."""
+import random
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from constants import (
+    Side,
+    CHECKPOINT_INTERVAL,
+    REPETITION_HISTORY_SIZE,
+    FIFTY_MOVE_PLIES,
+)
+from pieces import PIECE_ORDER, King, Queen, Bishop, Rook, Knight, Pawn
+
+
+# A square is a (col_idx, row_idx) pair, and a position maps occupied squares
+# to the side and class of the piece standing on them
+Square = Tuple[int, int]
+Position = Dict[Square, Tuple[Side, type]]
+
+
+class Move(NamedTuple):
+    """A single ply, as played."""
+
+    side: Side
+    piece_cls: type
+    start: Square
+    end: Square
+    captured: Optional[Square] = None
+
+
+# Random keys for each piece on each square, XORed together into a position key
+# which can be updated move by move. The seed is fixed so keys are reproducible.
+_key_random = random.Random(0)
+PIECE_KEYS = {
+    (side, piece_cls, (col, row)): _key_random.getrandbits(64)
+    for side in (Side.WHITE, Side.BLACK)
+    for piece_cls in (King, Queen, Bishop, Rook, Knight, Pawn)
+    for col in range(8)
+    for row in range(8)
+}
+BLACK_TO_MOVE_KEY = _key_random.getrandbits(64)
+EN_PASSANT_KEYS = [_key_random.getrandbits(64) for _ in range(8)]
+
+
+def get_position_key(position: Position, side_to_move: Side = Side.WHITE) -> int:
+    """Compute the key of a position from scratch."""
+    key = 0
+    for square, (side, piece_cls) in position.items():
+        key ^= PIECE_KEYS[(side, piece_cls, square)]
+    if side_to_move == Side.BLACK:
+        key ^= BLACK_TO_MOVE_KEY
+    return key
+
+
+def initial_position() -> Position:
+    """Get the position at the start of the game."""
+    position = {}
+    for side in (Side.WHITE, Side.BLACK):
+        order = PIECE_ORDER if side == Side.WHITE else reversed(PIECE_ORDER)
+        back_row = 0 if side == Side.WHITE else 7
+        pawn_row = 1 if side == Side.WHITE else 6
+        for col, piece_cls in enumerate(order):
+            position[(col, back_row)] = (side, piece_cls)
+            position[(col, pawn_row)] = (side, Pawn)
+    return position
+
+
+def apply_move(position: Position, move: Move):
+    """Play a move on a position in place."""
+    if move.captured is not None:
+        position.pop(move.captured, None)
+    position[move.end] = position.pop(move.start)
+
+
+class GameRecord:
+    """The moves of a game, with a full position snapshot every few plies.
+
+    Rebuilding the position at some ply only replays the moves since the
+    nearest earlier checkpoint, so seeking stays cheap however long the game.
+
+    The record also keeps the keys of recent positions in a ring buffer, and a
+    halfmove clock counting plies since the last pawn move or capture, for
+    detecting draws by repetition and by the fifty-move rule.
+    """
+
+    def __init__(self, checkpoint_interval: int = CHECKPOINT_INTERVAL):
+        self.checkpoint_interval = checkpoint_interval
+        self.moves: List[Move] = []
+
+        self.position = initial_position()
+        self.checkpoints: List[Position] = [dict(self.position)]
+
+        self.key = get_position_key(self.position)
+        self.keys = [0] * REPETITION_HISTORY_SIZE
+        self.keys[0] = self.key
+        self.halfmove_clock = 0
+        self.en_passant_col = None
+
+    def __len__(self):
+        return len(self.moves)
+
+    def append(self, move: Move):
+        """Record a move played on the current position."""
+        self.update_key(move)
+
+        # Pawn moves and captures can't be undone, so no earlier position can repeat
+        if move.piece_cls == Pawn or move.captured is not None:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        apply_move(self.position, move)
+        self.moves.append(move)
+        self.keys[len(self.moves) % REPETITION_HISTORY_SIZE] = self.key
+        if len(self.moves) % self.checkpoint_interval == 0:
+            self.checkpoints.append(dict(self.position))
+
+    def update_key(self, move: Move):
+        """Update the position key for a move, before it is played."""
+        self.key ^= PIECE_KEYS[(move.side, move.piece_cls, move.start)]
+        self.key ^= PIECE_KEYS[(move.side, move.piece_cls, move.end)]
+        if move.captured is not None:
+            captured_side, captured_cls = self.position[move.captured]
+            self.key ^= PIECE_KEYS[(captured_side, captured_cls, move.captured)]
+        self.key ^= BLACK_TO_MOVE_KEY
+
+        # An en passant capture being available makes the position different,
+        # but only if an enemy pawn beside the pushed pawn could make it
+        if self.en_passant_col is not None:
+            self.key ^= EN_PASSANT_KEYS[self.en_passant_col]
+        self.en_passant_col = None
+        if move.piece_cls == Pawn and abs(move.end[1] - move.start[1]) == 2:
+            col, row = move.end
+            enemy_pawn = (move.side.swap(), Pawn)
+            if enemy_pawn in (
+                self.position.get((col - 1, row)),
+                self.position.get((col + 1, row)),
+            ):
+                self.en_passant_col = col
+                self.key ^= EN_PASSANT_KEYS[self.en_passant_col]
+
+    def repetition_count(self) -> int:
+        """Get how many times the current position has occurred.
+
+        Only positions since the last pawn move or capture can match, and only
+        those with the same side to move, so just every other one is checked.
+        """
+        count = 1
+        lookback = min(self.halfmove_clock, len(self.keys) - 1)
+        for back in range(2, lookback + 1, 2):
+            ply = len(self.moves) - back
+            if self.keys[ply % len(self.keys)] == self.key:
+                count += 1
+        return count
+
+    def get_draw_reason(self) -> Optional[str]:
+        """Get why the game is drawn, or None if it isn't."""
+        if self.halfmove_clock >= FIFTY_MOVE_PLIES:
+            return "the fifty-move rule"
+        if self.repetition_count() >= 3:
+            return "threefold repetition"
+        return None
+
+    def position_at(self, ply: int) -> Position:
+        """Get the position after the first `ply` moves of the game."""
+        if not 0 <= ply <= len(self.moves):
+            raise ValueError("Invalid ply")
+
+        checkpoint_idx = ply // self.checkpoint_interval
+        position = dict(self.checkpoints[checkpoint_idx])
+        for move in self.moves[checkpoint_idx * self.checkpoint_interval : ply]:
+            apply_move(position, move)
+        return position
@@ -3,7 +3,8 @@ from __future__ import annotations
 
 import arcade
 
-from constants import Side, BoardPosition, CHARACTER_SCALING
+from constants import Side, BoardPosition, BoardTransform, BOARD_TRANSFORM
+from history import Move
 from pieces import PIECE_ORDER, Pawn, King
 
 
@@ -17,9 +18,10 @@ def get_en_passant_position(opponent):
 
 
 class Player:
-    def __init__(self, side: Side, game):
+    def __init__(self, side: Side, game, transform: BoardTransform = BOARD_TRANSFORM):
         self.side = side
         self.game = game
+        self.transform = transform
 
         self.pieces = arcade.SpriteList()
 
@@ -34,13 +36,19 @@ class Player:
         for col, piece_cls in enumerate(order):
             row_idx = 0 if self.side == Side.WHITE else 7
             piece = piece_cls(
-                self.side, BoardPosition(col, row_idx), scale=CHARACTER_SCALING
+                self.side,
+                BoardPosition(col, row_idx, self.transform),
+                scale=self.transform.character_scaling,
             )
             self.pieces.append(piece)
 
             # Add a pawn
             row_idx = 1 if self.side == Side.WHITE else 6
-            pawn = Pawn(self.side, BoardPosition(col, row_idx), scale=CHARACTER_SCALING)
+            pawn = Pawn(
+                self.side,
+                BoardPosition(col, row_idx, self.transform),
+                scale=self.transform.character_scaling,
+            )
             self.pieces.append(pawn)
 
     def update(self, selected_square: BoardPosition, opponent: Player):
@@ -82,6 +90,19 @@ class Player:
                     if selected_square == en_passant_position:
                         captured_piece = opponent.en_passant_pawn
 
+                # Record the move before the game can end on it
+                self.game.record.append(
+                    Move(
+                        self.side,
+                        type(self.selected_piece),
+                        self.selected_piece.board_position.get_square(),
+                        selected_square.get_square(),
+                        None
+                        if captured_piece is None
+                        else captured_piece.board_position.get_square(),
+                    )
+                )
+
                 # Do moves
                 if captured_piece is not None:
                     opponent.captured_piece(captured_piece)
@@ -90,6 +111,12 @@ class Player:
                         self.game.end_game(self)
                 else:
                     arcade.play_sound(self.game.move_sound)
+                self.game.evaluation.move_piece(
+                    self.side,
+                    type(self.selected_piece),
+                    self.selected_piece.board_position.get_square(),
+                    selected_square.get_square(),
+                )
                 self.selected_piece.set_board_position(selected_square)
 
             # Reset variables
@@ -99,5 +126,9 @@ class Player:
         return finished_move
 
     def captured_piece(self, piece):
-        self.pieces.remove(piece)
+        # The piece may also be in a shared list for drawing, so remove it from all
+        piece.remove_from_sprite_lists()
+        self.game.evaluation.remove_piece(
+            piece.side, type(piece), piece.board_position.get_square()
+        )
         arcade.play_sound(self.game.take_sound)
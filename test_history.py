@@ -0,0 +1,48 @@
+"""Tests for the move history."""
+from constants import Side
+from history import GameRecord, Move
+from pieces import Knight, Pawn
+
+
+def test_threefold_repetition_after_double_push():
+    """A double push with no pawn able to take en passant still repeats."""
+    record = GameRecord()
+    record.append(Move(Side.WHITE, Pawn, (4, 1), (4, 3)))
+
+    shuffle = [
+        Move(Side.BLACK, Knight, (6, 7), (5, 5)),
+        Move(Side.WHITE, Knight, (6, 0), (5, 2)),
+        Move(Side.BLACK, Knight, (5, 5), (6, 7)),
+        Move(Side.WHITE, Knight, (5, 2), (6, 0)),
+    ]
+    for move in shuffle * 2:
+        assert record.get_draw_reason() is None
+        record.append(move)
+
+    assert len(record) == 9
+    assert record.repetition_count() == 3
+    assert record.get_draw_reason() == "threefold repetition"
+
+
+def test_en_passant_makes_position_different():
+    """A double push which can be taken en passant doesn't repeat later."""
+    record = GameRecord()
+    for move in [
+        Move(Side.WHITE, Pawn, (4, 1), (4, 3)),
+        Move(Side.BLACK, Knight, (6, 7), (5, 5)),
+        Move(Side.WHITE, Pawn, (4, 3), (4, 4)),
+        Move(Side.BLACK, Pawn, (3, 6), (3, 4)),
+    ]:
+        record.append(move)
+    key_after_push = record.key
+
+    for move in [
+        Move(Side.WHITE, Knight, (6, 0), (5, 2)),
+        Move(Side.BLACK, Knight, (5, 5), (6, 7)),
+        Move(Side.WHITE, Knight, (5, 2), (6, 0)),
+        Move(Side.BLACK, Knight, (6, 7), (5, 5)),
+    ]:
+        record.append(move)
+
+    assert record.key != key_after_push
+    assert record.repetition_count() == 1
@@ -1,27 +1,137 @@
 """Views for the chess game."""
 
 import arcade
+from collections import defaultdict
 from enum import Enum
+from typing import List, Optional
 
 from constants import (
     SCREEN_WIDTH,
     SCREEN_HEIGHT,
     WIDTH_BUFFER,
+    CHARACTER_SCALING,
     Side,
     WHITE_COLOR,
     OFFWHITE_COLOR,
     BLACK_COLOR,
     OFFBLACK_COLOR,
     BoardPosition,
+    BoardTransform,
 )
+from evaluation import Evaluation
+from history import GameRecord, initial_position
 from player import Player, get_en_passant_position
 
 
+# Space around each board in a simultaneous exhibition, in pixels
+BOARD_MARGIN = 8
+
+
 class PlayerState(Enum):
     SELECT_PIECE = 1
     MOVE_PIECE = 2
 
 
+def get_highlighted(current_player: Player, opponent: Player):
+    """Get the positions of the current player's selected piece and its moves."""
+    if current_player.selected_piece is None:
+        return []
+
+    highlighted = [current_player.selected_piece.board_position]
+    highlighted.extend(
+        current_player.selected_piece.get_possible_moves(
+            current_player.pieces,
+            opponent.pieces,
+            get_en_passant_position(opponent),
+        )
+    )
+    return highlighted
+
+
+def get_result_text(winner: Optional[Player], draw_reason: Optional[str] = None):
+    """Describe how a game ended."""
+    if winner is None:
+        return f"Draw by {draw_reason}!"
+    return f"{winner.side} wins!".capitalize()
+
+
+def create_square_shape(position: BoardPosition, highlighted: bool = False):
+    """Create a shape for one square of a board, to be drawn in a batch."""
+    color_white = (position.col_idx + position.row_idx) % 2 == 1
+    if highlighted:
+        color = OFFWHITE_COLOR if color_white else OFFBLACK_COLOR
+    else:
+        color = WHITE_COLOR if color_white else BLACK_COLOR
+
+    square_size = position.transform.square_size
+    return arcade.create_rectangle_filled(
+        position.center_x, position.center_y, square_size, square_size, color
+    )
+
+
+def draw_eval_bar(evaluation: Evaluation, center_x: float, bot: float, top: float):
+    """Draw a vertical bar showing how much better white's position is."""
+    score = evaluation.score()
+
+    # Map the score onto an expected result, so the bar saturates smoothly
+    white_fraction = 1 / (1 + 10 ** (-score / 400))
+    split_y = bot + white_fraction * (top - bot)
+
+    arcade.draw_lrtb_rectangle_filled(
+        center_x - 10, center_x + 10, top, split_y, arcade.csscolor.BLACK
+    )
+    arcade.draw_lrtb_rectangle_filled(
+        center_x - 10, center_x + 10, split_y, bot, WHITE_COLOR
+    )
+    arcade.draw_lrtb_rectangle_outline(
+        center_x - 10, center_x + 10, top, bot, arcade.csscolor.BLACK
+    )
+    arcade.draw_text(
+        f"{score / 100:+.2f}",
+        center_x,
+        bot - 25,
+        arcade.color.BLACK,
+        font_size=10,
+        anchor_x="center",
+    )
+
+
+def draw_board(highlighted: List[BoardPosition]):
+    """Draw the underlying board, with the given positions highlighted."""
+    arcade.draw_lrtb_rectangle_outline(
+        0,
+        SCREEN_WIDTH - WIDTH_BUFFER,
+        SCREEN_HEIGHT,
+        0,
+        arcade.csscolor.BLACK,
+        border_width=10,
+    )
+
+    color_white = False
+    for row in range(8):
+        for col in range(8):
+            position = BoardPosition(col, row)
+
+            # Get color based on boolean
+            if position in highlighted:
+                color = OFFWHITE_COLOR if color_white else OFFBLACK_COLOR
+            else:
+                color = WHITE_COLOR if color_white else BLACK_COLOR
+
+            # Draw a filled rectangle
+            arcade.draw_lrtb_rectangle_filled(
+                position.left,
+                position.right,
+                position.top,
+                position.bot,
+                color,
+            )
+            # Switch color based on column
+            color_white = not color_white
+        # Switch starting color based on row
+        color_white = not color_white
+
+
 class ChessGame(arcade.View):
     """Main application class."""
 
@@ -33,6 +143,9 @@ class ChessGame(arcade.View):
         self.white_player = None
         self.black_player = None
         self.white_turn = None
+        self.record = None
+        self.evaluation = None
+        self.show_eval = False
 
         # Sounds!
         self.move_sound = arcade.load_sound(":resources:sounds/rockHit2.wav")
@@ -47,6 +160,8 @@ class ChessGame(arcade.View):
         self.white_player = Player(Side.WHITE, self)
         self.black_player = Player(Side.BLACK, self)
         self.white_turn = True
+        self.record = GameRecord()
+        self.evaluation = Evaluation.from_position(initial_position())
 
     def on_draw(self):
         """Render the screen."""
@@ -83,6 +198,18 @@ class ChessGame(arcade.View):
             anchor_x="center",
         )
 
+        panel_x = SCREEN_WIDTH - WIDTH_BUFFER / 2
+        if self.show_eval:
+            draw_eval_bar(self.evaluation, panel_x, 100, SCREEN_HEIGHT - 125)
+        arcade.draw_text(
+            "E: toggle eval bar",
+            panel_x,
+            25,
+            arcade.color.BLACK,
+            font_size=10,
+            anchor_x="center",
+        )
+
     def on_mouse_press(self, x: float, y: float, button: int, _modifiers: int):
         if button != arcade.MOUSE_BUTTON_LEFT:
             return
@@ -96,54 +223,22 @@ class ChessGame(arcade.View):
             if change_turn:
                 self.white_turn = not self.white_turn
 
-    def draw_board(self):
-        """Draw the underlying board."""
-        arcade.draw_lrtb_rectangle_outline(
-            0,
-            SCREEN_WIDTH - WIDTH_BUFFER,
-            SCREEN_HEIGHT,
-            0,
-            arcade.csscolor.BLACK,
-            border_width=10,
-        )
+                draw_reason = self.record.get_draw_reason()
+                if draw_reason is not None:
+                    self.end_game(None, draw_reason)
+
+    def on_key_press(self, symbol: int, _modifiers: int):
+        if symbol == arcade.key.E:
+            self.show_eval = not self.show_eval
 
+    def draw_board(self):
+        """Draw the underlying board, highlighting the selected piece's moves."""
         current_player = self.white_player if self.white_turn else self.black_player
         opponent = self.black_player if self.white_turn else self.white_player
+        draw_board(get_highlighted(current_player, opponent))
 
-        color_white = False
-        for row in range(8):
-            for col in range(8):
-                position = BoardPosition(col, row)
-
-                # Get color based on boolean
-                if current_player.selected_piece is not None and (
-                    current_player.selected_piece.board_position == position
-                    or position
-                    in current_player.selected_piece.get_possible_moves(
-                        current_player.pieces,
-                        opponent.pieces,
-                        get_en_passant_position(opponent),
-                    )
-                ):
-                    color = OFFWHITE_COLOR if color_white else OFFBLACK_COLOR
-                else:
-                    color = WHITE_COLOR if color_white else BLACK_COLOR
-
-                # Draw a filled rectangle
-                arcade.draw_lrtb_rectangle_filled(
-                    position.left,
-                    position.right,
-                    position.top,
-                    position.bot,
-                    color,
-                )
-                # Switch color based on column
-                color_white = not color_white
-            # Switch starting color based on row
-            color_white = not color_white
-
-    def end_game(self, winner: Player):
-        end_view = EndView(winner)
+    def end_game(self, winner: Optional[Player], draw_reason: Optional[str] = None):
+        end_view = EndView(winner, self.record, draw_reason)
         self.window.show_view(end_view)
 
 
@@ -171,26 +266,49 @@ class WelcomeView(arcade.View):
             font_size=20,
             anchor_x="center",
         )
+        arcade.draw_text(
+            "Press S for a Simultaneous Exhibition",
+            SCREEN_WIDTH / 2,
+            SCREEN_HEIGHT / 2 - 110,
+            arcade.color.WHITE,
+            font_size=20,
+            anchor_x="center",
+        )
 
     def on_mouse_press(self, _x, _y, _button, _modifiers):
         game_view = ChessGame()
         game_view.setup()
         self.window.show_view(game_view)
 
+    def on_key_press(self, symbol: int, _modifiers: int):
+        if symbol == arcade.key.S:
+            simul_view = SimulView()
+            simul_view.setup()
+            self.window.show_view(simul_view)
+
 
 class EndView(arcade.View):
-    def __init__(self, winner: Player, **kwargs):
-        """Create the view."""
+    def __init__(
+        self,
+        winner: Optional[Player],
+        record: GameRecord = None,
+        draw_reason: Optional[str] = None,
+        **kwargs,
+    ):
+        """Create the view. A winner of None means the game was drawn."""
         super().__init__(**kwargs)
         self.winner = winner
+        self.record = record
+        self.draw_reason = draw_reason
 
     def on_show(self):
         """Run once when we switch to this view."""
-        color = (
-            arcade.csscolor.WHITE
-            if self.winner.side == Side.WHITE
-            else arcade.csscolor.BLACK
-        )
+        if self.winner is None:
+            color = arcade.csscolor.DARK_SLATE_BLUE
+        elif self.winner.side == Side.WHITE:
+            color = arcade.csscolor.WHITE
+        else:
+            color = arcade.csscolor.BLACK
         arcade.set_background_color(color)
 
     def on_draw(self):
@@ -198,11 +316,11 @@ class EndView(arcade.View):
         arcade.start_render()
         color = (
             arcade.csscolor.BLACK
-            if self.winner.side == Side.WHITE
+            if self.winner is not None and self.winner.side == Side.WHITE
             else arcade.csscolor.WHITE
         )
         arcade.draw_text(
-            f"{self.winner.side} wins!".capitalize(),
+            get_result_text(self.winner, self.draw_reason),
             SCREEN_WIDTH / 2,
             SCREEN_HEIGHT / 2,
             color,
@@ -217,7 +335,314 @@ class EndView(arcade.View):
             font_size=20,
             anchor_x="center",
         )
+        if self.record is not None:
+            arcade.draw_text(
+                "Press R to Review the Game",
+                SCREEN_WIDTH / 2,
+                SCREEN_HEIGHT / 2 - 110,
+                color,
+                font_size=20,
+                anchor_x="center",
+            )
 
     def on_mouse_press(self, _x, _y, _button, _modifiers):
         view = WelcomeView()
         self.window.show_view(view)
+
+    def on_key_press(self, symbol: int, _modifiers: int):
+        if symbol == arcade.key.R and self.record is not None:
+            view = ReplayView(self.record)
+            self.window.show_view(view)
+
+
+class ReplayView(arcade.View):
+    """View for stepping and scrubbing through a recorded game."""
+
+    # The scrub bar sits along the bottom of the side panel
+    SCRUB_LEFT = SCREEN_WIDTH - WIDTH_BUFFER + 25
+    SCRUB_RIGHT = SCREEN_WIDTH - 25
+    SCRUB_Y = 100
+    SCRUB_HEIGHT = 20
+
+    def __init__(self, record: GameRecord, **kwargs):
+        """Create the view, starting at the initial position."""
+        super().__init__(**kwargs)
+        self.record = record
+        self.ply = 0
+        self.scrubbing = False
+
+        # Sprites on the board keyed by square, and sprites off the board
+        # keyed by side and piece class, ready to be put back on a seek
+        self.pieces = arcade.SpriteList()
+        self.board_sprites = {}
+        self.spare_sprites = defaultdict(list)
+
+        self.seek(0)
+
+    def on_show(self):
+        """Run once when we switch to this view."""
+        arcade.set_background_color(arcade.csscolor.WHITE)
+
+    def seek(self, ply: int):
+        """Show the position after the given number of plies."""
+        ply = max(0, min(ply, len(self.record)))
+        position = self.record.position_at(ply)
+
+        # Take off every sprite which doesn't belong on its square anymore
+        for square, sprite in list(self.board_sprites.items()):
+            if position.get(square) != (sprite.side, type(sprite)):
+                del self.board_sprites[square]
+                self.pieces.remove(sprite)
+                self.spare_sprites[(sprite.side, type(sprite))].append(sprite)
+
+        # Then fill the empty squares, reusing spare sprites where we can
+        for square, (side, piece_cls) in position.items():
+            if square in self.board_sprites:
+                continue
+
+            board_position = BoardPosition(*square)
+            spares = self.spare_sprites[(side, piece_cls)]
+            if spares:
+                sprite = spares.pop()
+                sprite.set_board_position(board_position)
+            else:
+                sprite = piece_cls(side, board_position, scale=CHARACTER_SCALING)
+            self.pieces.append(sprite)
+            self.board_sprites[square] = sprite
+
+        self.ply = ply
+
+    def on_draw(self):
+        """Render the screen."""
+        arcade.start_render()
+
+        # Highlight the last move played
+        highlighted = []
+        if self.ply > 0:
+            move = self.record.moves[self.ply - 1]
+            highlighted = [BoardPosition(*move.start), BoardPosition(*move.end)]
+        draw_board(highlighted)
+        self.pieces.draw()
+
+        panel_x = SCREEN_WIDTH - WIDTH_BUFFER / 2
+        arcade.draw_text(
+            "Replay",
+            panel_x,
+            SCREEN_HEIGHT - 50,
+            arcade.color.BLACK,
+            anchor_x="center",
+        )
+        arcade.draw_text(
+            f"Ply {self.ply} / {len(self.record)}",
+            panel_x,
+            SCREEN_HEIGHT - 75,
+            arcade.color.BLACK,
+            anchor_x="center",
+        )
+        for idx, line in enumerate(
+            (
+                "Left/Right: step",
+                "Down/Up: 10 plies",
+                "Home/End: start/end",
+                "Esc: main menu",
+            )
+        ):
+            arcade.draw_text(
+                line,
+                panel_x,
+                SCREEN_HEIGHT - 125 - 25 * idx,
+                arcade.color.BLACK,
+                font_size=10,
+                anchor_x="center",
+            )
+
+        # Scrub bar, with a handle at the current ply
+        arcade.draw_lrtb_rectangle_filled(
+            self.SCRUB_LEFT,
+            self.SCRUB_RIGHT,
+            self.SCRUB_Y + self.SCRUB_HEIGHT / 2,
+            self.SCRUB_Y - self.SCRUB_HEIGHT / 2,
+            OFFBLACK_COLOR,
+        )
+        fraction = self.ply / len(self.record) if len(self.record) else 0
+        handle_x = self.SCRUB_LEFT + fraction * (self.SCRUB_RIGHT - self.SCRUB_LEFT)
+        arcade.draw_lrtb_rectangle_filled(
+            handle_x - 4,
+            handle_x + 4,
+            self.SCRUB_Y + self.SCRUB_HEIGHT,
+            self.SCRUB_Y - self.SCRUB_HEIGHT,
+            arcade.csscolor.BLACK,
+        )
+
+    def seek_to_pixel(self, x: float):
+        """Seek to the ply under an x location in pixels on the scrub bar."""
+        fraction = (x - self.SCRUB_LEFT) / (self.SCRUB_RIGHT - self.SCRUB_LEFT)
+        self.seek(round(fraction * len(self.record)))
+
+    def on_mouse_press(self, x: float, y: float, button: int, _modifiers: int):
+        if button != arcade.MOUSE_BUTTON_LEFT:
+            return
+
+        in_x = self.SCRUB_LEFT <= x <= self.SCRUB_RIGHT
+        in_y = abs(y - self.SCRUB_Y) <= self.SCRUB_HEIGHT
+        if in_x and in_y:
+            self.scrubbing = True
+            self.seek_to_pixel(x)
+
+    def on_mouse_drag(self, x, _y, _dx, _dy, _buttons, _modifiers):
+        if self.scrubbing:
+            self.seek_to_pixel(x)
+
+    def on_mouse_release(self, _x, _y, _button, _modifiers):
+        self.scrubbing = False
+
+    def on_key_press(self, symbol: int, _modifiers: int):
+        if symbol == arcade.key.RIGHT:
+            self.seek(self.ply + 1)
+        elif symbol == arcade.key.LEFT:
+            self.seek(self.ply - 1)
+        elif symbol == arcade.key.UP:
+            self.seek(self.ply + 10)
+        elif symbol == arcade.key.DOWN:
+            self.seek(self.ply - 10)
+        elif symbol == arcade.key.HOME:
+            self.seek(0)
+        elif symbol == arcade.key.END:
+            self.seek(len(self.record))
+        elif symbol == arcade.key.ESCAPE:
+            view = WelcomeView()
+            self.window.show_view(view)
+
+
+class SimulBoard:
+    """The state of one game within a simultaneous exhibition."""
+
+    def __init__(self, transform: BoardTransform, move_sound, take_sound):
+        """Set up a new game on the board at the given transform."""
+        self.transform = transform
+        self.move_sound = move_sound
+        self.take_sound = take_sound
+
+        self.white_player = Player(Side.WHITE, self, transform)
+        self.black_player = Player(Side.BLACK, self, transform)
+        self.white_turn = True
+        self.record = GameRecord()
+        self.evaluation = Evaluation.from_position(initial_position())
+        self.result = None
+
+    def get_players(self):
+        """Get the current player and their opponent."""
+        if self.white_turn:
+            return self.white_player, self.black_player
+        return self.black_player, self.white_player
+
+    def update(self, x: float, y: float):
+        """Handle a click at an x and y location in pixels on this board."""
+        if self.result is not None:
+            return
+
+        current_player, opponent = self.get_players()
+        position = BoardPosition.get_from_pixels(x, y, self.transform)
+        if position.check_valid(0, 0):
+            change_turn = current_player.update(position, opponent)
+            if change_turn:
+                self.white_turn = not self.white_turn
+
+                draw_reason = self.record.get_draw_reason()
+                if draw_reason is not None:
+                    self.end_game(None, draw_reason)
+
+    def end_game(self, winner: Optional[Player], draw_reason: Optional[str] = None):
+        self.result = get_result_text(winner, draw_reason)
+
+
+class SimulView(arcade.View):
+    """View for playing many games at once on a grid of boards."""
+
+    def __init__(self, rows: int = 4, cols: int = 4, **kwargs):
+        """Create the view."""
+        super().__init__(**kwargs)
+        self.rows = rows
+        self.cols = cols
+        self.boards = []
+
+        # Every board's pieces share one sprite list, and every board's squares
+        # one shape list, so each is a single draw however many boards there are
+        self.pieces = None
+        self.squares = None
+        self.highlights = None
+
+        # Sounds!
+        self.move_sound = arcade.load_sound(":resources:sounds/rockHit2.wav")
+        self.take_sound = arcade.load_sound(":resources:sounds/jump2.wav")
+
+    def setup(self):
+        """Set up the boards - call to restart."""
+        cell_size = min(SCREEN_WIDTH / self.cols, SCREEN_HEIGHT / self.rows)
+        square_size = (cell_size - 2 * BOARD_MARGIN) / 8
+
+        self.boards = []
+        self.pieces = arcade.SpriteList()
+        self.squares = arcade.ShapeElementList()
+        self.highlights = arcade.ShapeElementList()
+        for row in range(self.rows):
+            for col in range(self.cols):
+                transform = BoardTransform(
+                    col * cell_size + BOARD_MARGIN,
+                    SCREEN_HEIGHT - (row + 1) * cell_size + BOARD_MARGIN,
+                    square_size,
+                )
+                board = SimulBoard(transform, self.move_sound, self.take_sound)
+                self.boards.append(board)
+
+                self.pieces.extend(board.white_player.pieces)
+                self.pieces.extend(board.black_player.pieces)
+                for board_row in range(8):
+                    for board_col in range(8):
+                        position = BoardPosition(board_col, board_row, transform)
+                        self.squares.append(create_square_shape(position))
+
+    def on_show(self):
+        """Run once when we switch to this view."""
+        arcade.set_background_color(arcade.csscolor.WHITE)
+
+    def update_highlights(self):
+        """Rebuild the highlighted squares of every board."""
+        self.highlights = arcade.ShapeElementList()
+        for board in self.boards:
+            for position in get_highlighted(*board.get_players()):
+                self.highlights.append(create_square_shape(position, True))
+
+    def on_draw(self):
+        """Render the screen."""
+        arcade.start_render()
+
+        self.squares.draw()
+        self.highlights.draw()
+        self.pieces.draw()
+
+        for board in self.boards:
+            if board.result is not None:
+                arcade.draw_text(
+                    board.result,
+                    (board.transform.left + board.transform.right) / 2,
+                    (board.transform.bot + board.transform.top) / 2,
+                    arcade.color.RED,
+                    font_size=14,
+                    anchor_x="center",
+                    anchor_y="center",
+                )
+
+    def on_mouse_press(self, x: float, y: float, button: int, _modifiers: int):
+        if button != arcade.MOUSE_BUTTON_LEFT:
+            return
+
+        board = next((b for b in self.boards if b.transform.contains(x, y)), None)
+        if board is not None:
+            board.update(x, y)
+            self.update_highlights()
+
+    def on_key_press(self, symbol: int, _modifiers: int):
+        if symbol == arcade.key.ESCAPE:
+            view = WelcomeView()
+            self.window.show_view(view)